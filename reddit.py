@@ -1,9 +1,22 @@
 import streamlit as st
 import praw
-import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from praw.models import MoreComments
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from datetime import datetime
-import time
 import re
+import csv
+import io
+import queue
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from functools import lru_cache
+
+try:
+    import trrex
+except ImportError:
+    trrex = None
 
 # Page configuration
 st.set_page_config(
@@ -32,10 +45,13 @@ st.sidebar.markdown("""
 - Wait a few minutes after creating the app
 """)
 
-# Input fields for Reddit API credentials
-client_id = st.sidebar.text_input("Client ID", type="password")
-client_secret = st.sidebar.text_input("Client Secret", type="password")
-user_agent = st.sidebar.text_input("User Agent", value="Unanswered Query Tool/1.0")
+# Input fields for Reddit API credentials, in a form so typing doesn't trigger
+# a rerun (and a connection check) on every keystroke
+with st.sidebar.form("creds_form"):
+    client_id = st.text_input("Client ID", type="password")
+    client_secret = st.text_input("Client Secret", type="password")
+    user_agent = st.text_input("User Agent", value="Unanswered Query Tool/1.0")
+    connect_button = st.form_submit_button("Connect")
 
 # Main interface
 col1, col2 = st.columns([2, 1])
@@ -86,16 +102,29 @@ with st.expander("Advanced Options"):
 def check_credentials():
     return client_id and client_secret and user_agent
 
+# HTTP session with a larger connection pool, so TLS connections are kept
+# alive and reused across requests; retries are left to prawcore's own retry loop
+def make_http_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20)
+    session.mount("https://", adapter)
+    return session
+
+# Build a Reddit client, on a fresh HTTP session unless one is given to share
+def create_reddit(client_id, client_secret, user_agent, session=None):
+    return praw.Reddit(
+        client_id=client_id,
+        client_secret=client_secret,
+        user_agent=user_agent,
+        check_for_async=False,
+        requestor_kwargs={"session": session or make_http_session()}
+    )
+
 # Function to initialize Reddit instance
 @st.cache_resource
 def init_reddit(client_id, client_secret, user_agent):
     try:
-        reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent,
-            check_for_async=False
-        )
+        reddit = create_reddit(client_id, client_secret, user_agent)
         # Test the connection
         test_sub = reddit.subreddit("test")
         test_sub.display_name
@@ -104,183 +133,306 @@ def init_reddit(client_id, client_secret, user_agent):
         st.error(f"Failed to connect to Reddit API: {str(e)}")
         return None
 
+# Cached Reddit search returning plain dicts (PRAW objects hold live sessions)
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False)
+def search_posts(_reddit, subreddit_name, search_term, time_filter, limit):
+    """Run a Reddit search and return lightweight post dicts, cached for 5 minutes"""
+    results = _reddit.subreddit(subreddit_name or "all").search(
+        search_term, sort="new", time_filter=time_filter, limit=limit
+    )
+    return tuple(
+        {
+            'id': submission.id,
+            'title': submission.title,
+            'selftext': submission.selftext or "",
+            # Lowercased once here so cached reruns never redo it
+            'title_lower': submission.title.lower(),
+            'selftext_lower': (submission.selftext or "").lower(),
+            'score': submission.score,
+            'num_comments': submission.num_comments,
+            'created_utc': submission.created_utc,
+            'permalink': submission.permalink,
+            'subreddit_name': submission.subreddit.display_name,
+            'author': str(submission.author) if submission.author else '[deleted]',
+        }
+        for submission in results
+    )
+
+# Stream posts for several search terms, skipping duplicates as they arrive
+def iter_unique_posts(reddit, subreddit_name, search_terms, time_filter, limit):
+    """Yield each post once across all search terms, searching lazily term by term"""
+    seen_ids = set()
+    for search_term in search_terms:
+        try:
+            posts = search_posts(reddit, subreddit_name, search_term, time_filter, limit)
+        except Exception as e:
+            st.warning(f"Search term '{search_term}' failed: {str(e)}")
+            continue
+        
+        for post in posts:
+            if post['id'] in seen_ids:
+                continue
+            seen_ids.add(post['id'])
+            yield post
+
+# Number of submissions whose comments are fetched concurrently
+COMMENT_FETCH_WORKERS = 8
+
+# PRAW instances are not thread-safe (the rate limiter and token refresh are
+# unsynchronised), so each comment worker checks out a client of its own.
+# Every client paces itself from the rate-limit headers Reddit returns. The
+# clients share one pooled HTTP session so their connections are reused.
+@st.cache_resource
+def init_worker_clients(client_id, client_secret, user_agent):
+    session = make_http_session()
+    clients = queue.Queue()
+    for _ in range(COMMENT_FETCH_WORKERS):
+        clients.put(create_reddit(client_id, client_secret, user_agent, session))
+    return clients
+
+# Build a single alternation regex for a list of literal phrases
+def compile_terms(terms, whole_words=False):
+    """Compile literal phrases into one regex so text is scanned only once"""
+    escaped = [re.escape(term) for term in terms]
+    boundary = r"\b" if whole_words else ""
+    if trrex is not None:
+        try:
+            return re.compile(trrex.make(escaped, prefix=boundary, suffix=boundary))
+        except re.error:
+            pass
+    # Longest first so overlapping phrases prefer the longer match
+    ordered = sorted(set(escaped), key=len, reverse=True)
+    return re.compile(boundary + "(?:" + "|".join(ordered) + ")" + boundary)
+
+# Keyword regex, compiled once per distinct search keyword
+@lru_cache(maxsize=32)
+def keyword_pattern(keyword_lower):
+    return re.compile(re.escape(keyword_lower))
+
+# Promotional indicators
+PROMO_INDICATORS = [
+    'watch the video', 'tutorial below', 'link in bio', 'dm me', 'check out',
+    'affiliate', 'sponsored', 'promotion', 'advertisement', 'buy now',
+    'limited time', 'special offer', 'discount', 'sale', 'deal',
+    'click here', 'subscribe', 'follow me', 'my channel', 'my course',
+    'will change everything', 'secret method', 'exposed', 'truth about',
+    'nobody talks about', 'revolutionary', 'game changer'
+]
+
+# URL patterns that suggest promotional content
+PROMO_URL_PATTERNS = [
+    'youtube.com', 'youtu.be', 'bit.ly', 'tinyurl.com', 'goo.gl'
+]
+
+# Question indicators ('?' itself is checked separately with a plain `in`)
+QUESTION_WORDS = ['how', 'what', 'why', 'which', 'where', 'when', 'who']
+HELP_WORDS = ['help', 'advice', 'recommend', 'suggest', 'opinion', 'thoughts']
+SEEKING_WORDS = ['looking for', 'need', 'want', 'seeking', 'trying to find']
+
+# Low quality comments, matched against the whole comment
+LOW_QUALITY_COMMENTS = frozenset({
+    'thanks', 'thank you', 'thx', '+1', 'same', 'this', 'agreed',
+    'yes', 'no', 'upvoted', 'bump', 'following', 'interested',
+    'me too', 'same here', 'lol', 'nice', 'cool', 'good luck'
+})
+
+# Bodies Reddit substitutes for deleted or removed comments (both 9 characters)
+DELETED_MARKERS = frozenset(('[deleted]', '[removed]'))
+
+# Meaningful comment indicators
+MEANINGFUL_INDICATORS = [
+    'recommend', 'suggest', 'try', 'use', 'check out', 'experience',
+    'worked for me', 'helped me', 'solution', 'answer', 'result'
+]
+
+# Contextual terms for relevance scoring
+SEO_RELATED = [
+    'search engine optimization', 'digital marketing', 'google ranking',
+    'website traffic', 'keyword research', 'backlinks', 'optimization',
+    'ranking', 'search engine', 'google', 'marketing', 'traffic',
+    'organic', 'serp', 'meta', 'analytics'
+]
+COURSE_RELATED = [
+    'tutorial', 'learn', 'training', 'education', 'class', 'lesson',
+    'certification', 'certificate', 'program', 'bootcamp', 'academy',
+    'instructor', 'teacher', 'beginner', 'advanced', 'online learning'
+]
+QUESTION_CONTEXTS = [
+    'best course', 'recommend course', 'good course', 'which course',
+    'course recommendation', 'learning', 'study', 'beginner',
+    'start with', 'where to learn', 'how to learn'
+]
+
+PROMO_RE = compile_terms(PROMO_INDICATORS + PROMO_URL_PATTERNS)
+QUESTION_RE = compile_terms(QUESTION_WORDS + HELP_WORDS + SEEKING_WORDS)
+MEANINGFUL_RE = compile_terms(MEANINGFUL_INDICATORS)
+SEO_RE = compile_terms(SEO_RELATED, whole_words=True)
+COURSE_RE = compile_terms(COURSE_RELATED, whole_words=True)
+QCTX_RE = compile_terms(QUESTION_CONTEXTS, whole_words=True)
+
+# Static per-search state, built once so the filter loop doesn't re-derive it
+@dataclass(frozen=True, slots=True)
+class SearchContext:
+    keyword_lower: str
+    kw_re: re.Pattern
+    seo_keyword: bool
+    course_keyword: bool
+    min_score: int
+    min_content_length: int
+    relevance_threshold: float
+    filter_promotional: bool
+    question_only_mode: bool
+    max_comments_threshold: int
+    promo_re: re.Pattern = PROMO_RE
+    question_re: re.Pattern = QUESTION_RE
+    seo_re: re.Pattern = SEO_RE
+    course_re: re.Pattern = COURSE_RE
+    qctx_re: re.Pattern = QCTX_RE
+    
+    @classmethod
+    def build(cls, keyword, min_score=0, relevance_threshold=0.3, max_comments_threshold=5,
+              question_only_mode=True, filter_promotional=True, min_content_length=50):
+        keyword_lower = keyword.lower()
+        return cls(
+            keyword_lower=keyword_lower,
+            kw_re=keyword_pattern(keyword_lower),
+            seo_keyword='seo' in keyword_lower,
+            course_keyword='course' in keyword_lower,
+            min_score=min_score,
+            min_content_length=min_content_length,
+            relevance_threshold=relevance_threshold,
+            filter_promotional=filter_promotional,
+            question_only_mode=question_only_mode,
+            max_comments_threshold=max_comments_threshold,
+        )
+
 # Enhanced function to detect promotional/spam content
-def is_promotional_content(title, content):
-    """Detect promotional or spam content"""
-    text = f"{title} {content}".lower()
-    
-    # Promotional indicators
-    promo_indicators = [
-        'watch the video', 'tutorial below', 'link in bio', 'dm me', 'check out',
-        'affiliate', 'sponsored', 'promotion', 'advertisement', 'buy now',
-        'limited time', 'special offer', 'discount', 'sale', 'deal',
-        'click here', 'subscribe', 'follow me', 'my channel', 'my course',
-        'will change everything', 'secret method', 'exposed', 'truth about',
-        'nobody talks about', 'revolutionary', 'game changer'
-    ]
-    
-    # URL patterns that suggest promotional content
-    url_patterns = [
-        'youtube.com', 'youtu.be', 'bit.ly', 'tinyurl.com', 'goo.gl'
-    ]
-    
-    promo_score = 0
-    for indicator in promo_indicators:
-        if indicator in text:
-            promo_score += 1
-    
-    for pattern in url_patterns:
-        if pattern in text:
-            promo_score += 1
-    
-    return promo_score >= 2  # Consider promotional if 2+ indicators
+def is_promotional_content(ctx, full_text_lower):
+    """Detect promotional or spam content in lowercased title + content"""
+    # Consider promotional if 2+ distinct indicators
+    return len(set(ctx.promo_re.findall(full_text_lower))) >= 2
 
 # Enhanced function to check if post is a genuine question
-def is_genuine_question(title, content):
-    """Check if post is asking a genuine question"""
-    text = f"{title} {content}".lower()
-    
-    # Question indicators
-    question_words = ['?', 'how', 'what', 'why', 'which', 'where', 'when', 'who']
-    help_words = ['help', 'advice', 'recommend', 'suggest', 'opinion', 'thoughts']
-    seeking_words = ['looking for', 'need', 'want', 'seeking', 'trying to find']
+def is_genuine_question(ctx, full_text_lower):
+    """Check if lowercased title + content is asking a genuine question"""
+    if '?' in full_text_lower:
+        return True
     
-    # Check for question patterns
-    has_question_word = any(word in text for word in question_words)
-    has_help_word = any(word in text for word in help_words)
-    has_seeking_word = any(phrase in text for phrase in seeking_words)
-    
-    return has_question_word or has_help_word or has_seeking_word
+    # Check for question, help or seeking patterns
+    return ctx.question_re.search(full_text_lower) is not None
 
 # Improved relevance scoring for SEO courses specifically
-def calculate_enhanced_relevance_score(title, content, keyword):
-    """Enhanced relevance scoring with better keyword matching"""
-    keyword_lower = keyword.lower()
-    title_lower = title.lower()
-    content_lower = content.lower() if content else ""
-    full_text = f"{title_lower} {content_lower}"
-    
+def calculate_enhanced_relevance_score(ctx, title_lower, content_lower, full_text, promotional=False):
+    """Enhanced relevance scoring with better keyword matching (all inputs lowercased)"""
     score = 0.0
     
-    # Exact keyword match in title (high weight)
-    if keyword_lower in title_lower:
-        score += 0.5
-        # Bonus for keyword being a significant part of title
-        title_words = title_lower.split()
-        if any(keyword_lower in word or word in keyword_lower for word in title_words):
-            score += 0.2
+    # Exact keyword match in title (high weight, including the former
+    # "keyword is a significant part of the title" bonus)
+    if ctx.kw_re.search(title_lower):
+        score += 0.7
     
     # Exact keyword match in content
-    if keyword_lower in content_lower:
+    if ctx.kw_re.search(content_lower):
         score += 0.3
     
-    # Enhanced contextual scoring for specific keywords
-    if 'seo' in keyword_lower:
-        seo_related = [
-            'search engine optimization', 'digital marketing', 'google ranking',
-            'website traffic', 'keyword research', 'backlinks', 'optimization',
-            'ranking', 'search engine', 'google', 'marketing', 'traffic',
-            'organic', 'serp', 'meta', 'analytics'
-        ]
-        for term in seo_related:
-            if term in full_text:
-                score += 0.15
-    
-    if 'course' in keyword_lower:
-        course_related = [
-            'tutorial', 'learn', 'training', 'education', 'class', 'lesson',
-            'certification', 'certificate', 'program', 'bootcamp', 'academy',
-            'instructor', 'teacher', 'beginner', 'advanced', 'online learning'
-        ]
-        for term in course_related:
-            if term in full_text:
-                score += 0.15
-    
-    # Question context bonus
-    question_contexts = [
-        'best course', 'recommend course', 'good course', 'which course',
-        'course recommendation', 'learning', 'study', 'beginner',
-        'start with', 'where to learn', 'how to learn'
-    ]
-    
-    for context in question_contexts:
-        if context in full_text:
+    # Contextual bonuses can't raise a score that already hit the cap, unless the
+    # promotional penalty below is going to scale it back under the cap
+    if score < 1.0 or promotional:
+        # Enhanced contextual scoring for specific keywords, weighted by
+        # occurrences and capped to avoid runaway scores
+        if ctx.seo_keyword:
+            score += 0.15 * min(len(ctx.seo_re.findall(full_text)), 3)
+        
+        if ctx.course_keyword:
+            score += 0.15 * min(len(ctx.course_re.findall(full_text)), 3)
+        
+        # Question context bonus
+        if ctx.qctx_re.search(full_text):
             score += 0.2
-            break
     
     # Penalty for promotional content
-    if is_promotional_content(title, content):
+    if promotional:
         score *= 0.3  # Significantly reduce score for promotional content
     
     return min(score, 1.0)
 
 # Enhanced unanswered detection
-def is_unanswered_enhanced(submission, max_comments=5):
-    """Enhanced check for unanswered posts"""
-    try:
-        if submission.num_comments == 0:
-            return True
-        
-        if submission.num_comments > max_comments * 2:
-            return False
+def is_unanswered_enhanced(reddit, post, max_comments=5):
+    """Enhanced check for unanswered posts, fetching comments only when needed.
+    
+    Fetch errors propagate so the caller can fall back without the failure being cached.
+    """
+    if post['num_comments'] == 0:
+        return True
+    
+    if post['num_comments'] > max_comments * 2:
+        return False
+    
+    if post['num_comments'] <= max_comments:
+        submission = reddit.submission(id=post['id'])
+        # Fetch only the top comments we inspect, in a single request
+        submission.comment_sort = "top"
+        submission.comment_limit = max_comments + 2
+        meaningful_comments = 0
         
-        if submission.num_comments <= max_comments:
-            try:
-                # Check comment quality more efficiently
-                submission.comments.replace_more(limit=1)  # Limited expansion for speed
-                meaningful_comments = 0
-                
-                for comment in submission.comments[:max_comments + 2]:
-                    if hasattr(comment, 'body') and comment.body:
-                        if not comment.body.lower().startswith(('[deleted]', '[removed]')):
-                            # More sophisticated comment quality check
-                            if is_meaningful_comment(comment.body):
-                                meaningful_comments += 1
-                                if meaningful_comments > max_comments // 2:  # Allow some meaningful comments
-                                    return False
-                
-                return True
-            except:
-                return True
+        for comment in submission.comments:
+            if isinstance(comment, MoreComments):
+                continue
+            body = comment.body
+            if not body or body[:9] in DELETED_MARKERS:
+                continue
+            # More sophisticated comment quality check
+            if is_meaningful_comment(body):
+                meaningful_comments += 1
+                if meaningful_comments > max_comments // 2:  # Allow some meaningful comments
+                    return False
         
-        return False
-    except:
-        return submission.num_comments <= max_comments
+        return True
+    
+    return False
+
+# Unanswered check memoized per (post, comment count, threshold); a new comment
+# changes the count and therefore the key
+@st.cache_data(ttl=300, max_entries=10000, show_spinner=False)
+def cached_is_unanswered(post_id, num_comments, max_comments, _reddit, _post):
+    return is_unanswered_enhanced(_reddit, _post, max_comments)
 
 def is_meaningful_comment(comment_body):
     """Check if comment provides meaningful help"""
-    if not comment_body or len(comment_body.strip()) < 15:
+    stripped = comment_body.strip() if comment_body else ""
+    if len(stripped) < 15:
         return False
     
-    comment_lower = comment_body.lower().strip()
+    comment_lower = stripped.lower()
     
-    # Low quality phrases
-    low_quality = [
-        'thanks', 'thank you', 'thx', '+1', 'same', 'this', 'agreed', 
-        'yes', 'no', 'upvoted', 'bump', 'following', 'interested', 
-        'me too', 'same here', 'lol', 'nice', 'cool', 'good luck'
-    ]
-    
-    if comment_lower in low_quality:
+    if comment_lower in LOW_QUALITY_COMMENTS:
         return False
     
-    # Check for meaningful content indicators
-    meaningful_indicators = [
-        'recommend', 'suggest', 'try', 'use', 'check out', 'experience',
-        'worked for me', 'helped me', 'solution', 'answer', 'result'
-    ]
-    
-    word_count = len(comment_body.split())
-    has_meaningful_content = any(indicator in comment_lower for indicator in meaningful_indicators)
+    # Only need to know whether there are fewer than 5 or at least 20 words,
+    # so stop splitting long comments after 20 words
+    word_count = len(stripped.split(None, 20))
+    if word_count < 5:
+        return False
     
-    return word_count >= 5 and (has_meaningful_content or word_count >= 20)
+    return word_count >= 20 or MEANINGFUL_RE.search(comment_lower) is not None
+
+# Result columns; results are kept column-wise as a dict of lists
+RESULT_COLUMNS = (
+    'Title', 'Subreddit', 'Author', 'Score', 'Comments', 'Created', 'URL',
+    'Content', 'Relevance', 'Content_Length', '_created_ts'
+)
+
+def empty_results():
+    return {column: [] for column in RESULT_COLUMNS}
 
 # Main search function with enhanced filtering
 def search_unanswered_questions_enhanced(reddit, keyword, subreddit_name=None, time_filter="all",
                                        limit=25, min_score=0, relevance_threshold=0.3,
                                        max_comments_threshold=5, question_only_mode=True,
                                        filter_promotional=True, min_content_length=50):
-    questions = []
+    questions = empty_results()
+    ctx = SearchContext.build(keyword, min_score, relevance_threshold, max_comments_threshold,
+                              question_only_mode, filter_promotional, min_content_length)
     
     try:
         # Search strategy: try multiple approaches
@@ -291,98 +443,180 @@ def search_unanswered_questions_enhanced(reddit, keyword, subreddit_name=None, t
             f"{keyword} recommend"
         ]
         
-        all_submissions = []
-        
-        for search_term in search_terms[:2]:  # Limit to avoid too many API calls
-            try:
-                if subreddit_name:
-                    subreddit = reddit.subreddit(subreddit_name)
-                    results = subreddit.search(search_term, sort="new", time_filter=time_filter, limit=limit*3)
-                else:
-                    results = reddit.subreddit("all").search(search_term, sort="new", time_filter=time_filter, limit=limit*3)
-                
-                all_submissions.extend(list(results))
-            except Exception as e:
-                st.warning(f"Search term '{search_term}' failed: {str(e)}")
-                continue
-        
-        # Remove duplicates based on submission ID
-        unique_submissions = {sub.id: sub for sub in all_submissions}.values()
+        # Limit to avoid too many API calls; later terms are only searched if needed
+        unique_posts = iter_unique_posts(reddit, subreddit_name, search_terms[:2], time_filter, limit*3)
         
         progress_bar = st.progress(0)
         status_text = st.empty()
         
         processed = 0
         found_unanswered = 0
+        uncommented = 0
+        shortlist = []
         
-        for submission in unique_submissions:
-            if found_unanswered >= limit:
+        # Phase 1: cheap filters on fields already returned by the search
+        for post in unique_posts:
+            # Posts without comments are unanswered without any fetch, so stop
+            # searching once there are enough of them
+            if uncommented >= limit:
                 break
             
             processed += 1
             if processed % 10 == 0:
-                status_text.text(f"Processing {processed} posts... Found {found_unanswered} quality questions")
-                progress_bar.progress(min(processed / (limit * 6), 1.0))
+                status_text.text(f"Filtering {processed} posts... Shortlisted {len(shortlist)} candidates")
             
             # Basic filters
-            if submission.score < min_score:
+            if post['score'] < ctx.min_score:
                 continue
             
             # Content length filter
-            content_length = len(submission.selftext) if submission.selftext else 0
-            if content_length < min_content_length and not submission.title.endswith('?'):
+            content_length = len(post['selftext'])
+            if content_length < ctx.min_content_length and not post['title'].endswith('?'):
                 continue
             
-            # Filter promotional content
-            if filter_promotional and is_promotional_content(submission.title, submission.selftext):
-                continue
+            # Lowercased text from the search cache, shared by every predicate
+            title_lower = post['title_lower']
+            content_lower = post['selftext_lower']
+            full_text_lower = f"{title_lower} {content_lower}"
             
             # Question-only mode filter
-            if question_only_mode and not is_genuine_question(submission.title, submission.selftext):
+            if ctx.question_only_mode and not is_genuine_question(ctx, full_text_lower):
                 continue
             
-            # Enhanced relevance scoring
-            relevance = calculate_enhanced_relevance_score(submission.title, submission.selftext, keyword)
+            # Enhanced relevance scoring, which also flags promotional content
+            promotional = is_promotional_content(ctx, full_text_lower)
+            relevance = calculate_enhanced_relevance_score(ctx, title_lower, content_lower,
+                                                           full_text_lower, promotional)
             
-            if relevance < relevance_threshold:
+            if relevance < ctx.relevance_threshold:
                 continue
             
-            # Enhanced unanswered check
-            if is_unanswered_enhanced(submission, max_comments_threshold):
-                questions.append({
-                    'Title': submission.title,
-                    'Subreddit': submission.subreddit.display_name,
-                    'Author': str(submission.author) if submission.author else '[deleted]',
-                    'Score': submission.score,
-                    'Comments': submission.num_comments,
-                    'Created': datetime.fromtimestamp(submission.created_utc).strftime('%Y-%m-%d %H:%M'),
-                    'URL': f"https://reddit.com{submission.permalink}",
-                    'Content': submission.selftext[:400] + "..." if len(submission.selftext) > 400 else submission.selftext,
-                    'Relevance': f"{relevance:.2f}",
-                    'Content_Length': len(submission.selftext) if submission.selftext else 0
-                })
-                found_unanswered += 1
+            # Filter promotional content
+            if ctx.filter_promotional and promotional:
+                continue
             
-            time.sleep(0.1)  # Rate limiting
+            shortlist.append((post, relevance, content_length))
+            if post['num_comments'] == 0:
+                uncommented += 1
+        
+        # Phase 2: enhanced unanswered check, fetching comments concurrently
+        checked = 0
+        
+        worker_clients = init_worker_clients(reddit.config.client_id, reddit.config.client_secret,
+                                             reddit.config.user_agent)
+        
+        def check_unanswered(post):
+            client = worker_clients.get()
+            try:
+                return cached_is_unanswered(post['id'], post['num_comments'], ctx.max_comments_threshold,
+                                            client, post)
+            except Exception:
+                # Treat posts whose comments could not be fetched as unanswered;
+                # st.cache_data does not cache the exception, so the next run retries
+                return True
+            finally:
+                worker_clients.put(client)
+        
+        # Outcomes are recorded by shortlist index so the kept posts are the first
+        # `limit` unanswered ones in shortlist order, whatever order checks finish in
+        outcomes = {}
+        futures = {}
+        next_index = 0
+        resolved = 0  # Length of the shortlist prefix whose outcome is known
+        prefix_found = 0
+        
+        # Workers share this run's context so they can read and fill Streamlit caches
+        with ThreadPoolExecutor(max_workers=COMMENT_FETCH_WORKERS, initializer=add_script_run_ctx,
+                                initargs=(None, get_script_run_ctx())) as executor:
+            while True:
+                # Keep the pool busy until the first `limit` unanswered posts are settled
+                while next_index < len(shortlist) and len(futures) < COMMENT_FETCH_WORKERS:
+                    futures[executor.submit(check_unanswered, shortlist[next_index][0])] = next_index
+                    next_index += 1
+                
+                if not futures:
+                    break
+                
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    outcomes[futures.pop(future)] = future.result()
+                    checked += 1
+                
+                while resolved in outcomes:
+                    prefix_found += outcomes[resolved]
+                    resolved += 1
+                
+                status_text.text(f"Checking {checked}/{len(shortlist)} posts... Found {prefix_found} quality questions")
+                progress_bar.progress(min(checked / len(shortlist), 1.0))
+                
+                if prefix_found >= limit:
+                    for future in futures:
+                        future.cancel()
+                    break
+        
+        for index in range(resolved):
+            if found_unanswered >= limit:
+                break
+            if not outcomes[index]:
+                continue
+            
+            post, relevance, content_length = shortlist[index]
+            selftext = post['selftext']
+            questions['Title'].append(post['title'])
+            questions['Subreddit'].append(post['subreddit_name'])
+            questions['Author'].append(post['author'])
+            questions['Score'].append(post['score'])
+            questions['Comments'].append(post['num_comments'])
+            questions['Created'].append(datetime.fromtimestamp(post['created_utc']).strftime('%Y-%m-%d %H:%M'))
+            questions['URL'].append(f"https://reddit.com{post['permalink']}")
+            questions['Content'].append((selftext[:400] + "...") if content_length > 400 else selftext)
+            questions['Relevance'].append(relevance)
+            questions['Content_Length'].append(content_length)
+            questions['_created_ts'].append(post['created_utc'])
+            found_unanswered += 1
         
         progress_bar.empty()
         status_text.empty()
         
-        # Sort by relevance score (highest first), then by recency
-        questions.sort(key=lambda x: (float(x['Relevance']), x['Created']), reverse=True)
+        # Sort by relevance score (highest first), then by recency, by
+        # computing one ordering and applying it to every column
+        relevances, created = questions['Relevance'], questions['_created_ts']
+        order = sorted(range(found_unanswered), key=lambda i: (relevances[i], created[i]), reverse=True)
+        for values in questions.values():
+            values[:] = [values[i] for i in order]
         
         return questions
     
     except Exception as e:
         st.error(f"Error searching Reddit: {str(e)}")
-        return []
+        return empty_results()
+
+# Export result columns as CSV, leaving out internal underscore-prefixed columns
+def questions_to_csv(questions):
+    columns = [column for column in questions if not column.startswith('_')]
+    values = [questions[column] for column in columns]
+    values[columns.index('Relevance')] = [f"{relevance:.2f}" for relevance in questions['Relevance']]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    writer.writerows(zip(*values))
+    return buffer.getvalue()
+
+# Check the credentials once when the form is submitted
+if connect_button:
+    if not check_credentials():
+        st.sidebar.warning("Please provide Reddit API credentials.")
+    else:
+        with st.spinner("Connecting to Reddit API..."):
+            if init_reddit(client_id, client_secret, user_agent):
+                st.sidebar.success("✅ Connected to Reddit API")
 
 # Main search logic
 if search_button:
     if not keyword:
         st.warning("Please enter a keyword to search for.")
     elif not check_credentials():
-        st.warning("Please provide Reddit API credentials in the sidebar.")
+        st.warning("Please provide Reddit API credentials in the sidebar and click Connect.")
     else:
         with st.spinner("Connecting to Reddit API..."):
             reddit = init_reddit(client_id, client_secret, user_agent)
@@ -405,62 +639,66 @@ if search_button:
                     min_content_length
                 )
             
-            if questions:
-                st.success(f"Found {len(questions)} high-quality unanswered questions!")
+            count = len(questions['Title'])
+            if count:
+                st.success(f"Found {count} high-quality unanswered questions!")
                 
                 # Display summary statistics
                 col_stats1, col_stats2, col_stats3, col_stats4 = st.columns(4)
                 with col_stats1:
-                    avg_relevance = sum(float(q['Relevance']) for q in questions) / len(questions)
+                    avg_relevance = sum(questions['Relevance']) / count
                     st.metric("Avg Relevance", f"{avg_relevance:.2f}")
                 with col_stats2:
-                    avg_score = sum(q['Score'] for q in questions) / len(questions)
+                    avg_score = sum(questions['Score']) / count
                     st.metric("Avg Score", f"{avg_score:.1f}")
                 with col_stats3:
-                    unique_subreddits = len(set(q['Subreddit'] for q in questions))
+                    unique_subreddits = len(set(questions['Subreddit']))
                     st.metric("Subreddits", unique_subreddits)
                 with col_stats4:
-                    recent_posts = sum(1 for q in questions if '2025-07' in q['Created'])
+                    recent_posts = sum(1 for created in questions['Created'] if '2025-07' in created)
                     st.metric("Recent Posts", recent_posts)
                 
                 st.markdown("---")
                 
                 # Display results
-                for i, q in enumerate(questions, 1):
+                for i in range(count):
+                    title = questions['Title'][i]
+                    relevance = questions['Relevance'][i]
+                    content = questions['Content'][i]
+                    content_length = questions['Content_Length'][i]
+                    
                     with st.container():
                         col_main, col_meta = st.columns([3, 1])
                         
                         with col_main:
                             # Color-code by relevance
-                            if float(q['Relevance']) >= 0.7:
-                                st.markdown(f"### 🎯 {i}. {q['Title']}")
-                            elif float(q['Relevance']) >= 0.5:
-                                st.markdown(f"### ✅ {i}. {q['Title']}")
+                            if relevance >= 0.7:
+                                st.markdown(f"### 🎯 {i + 1}. {title}")
+                            elif relevance >= 0.5:
+                                st.markdown(f"### ✅ {i + 1}. {title}")
                             else:
-                                st.markdown(f"### 📝 {i}. {q['Title']}")
+                                st.markdown(f"### 📝 {i + 1}. {title}")
                             
-                            if q['Content']:
-                                st.markdown(f"*{q['Content']}*")
-                            st.markdown(f"**[📍 View on Reddit]({q['URL']})**")
+                            if content:
+                                st.markdown(f"*{content}*")
+                            st.markdown(f"**[📍 View on Reddit]({questions['URL'][i]})**")
                         
                         with col_meta:
-                            st.metric("Relevance", q['Relevance'])
-                            st.metric("Score", q['Score'])
-                            st.metric("Comments", q['Comments'])
-                            st.write(f"**Subreddit:** r/{q['Subreddit']}")
-                            st.write(f"**Author:** u/{q['Author']}")
-                            st.write(f"**Posted:** {q['Created']}")
-                            if q['Content_Length'] > 0:
-                                st.write(f"**Content:** {q['Content_Length']} chars")
+                            st.metric("Relevance", f"{relevance:.2f}")
+                            st.metric("Score", questions['Score'][i])
+                            st.metric("Comments", questions['Comments'][i])
+                            st.write(f"**Subreddit:** r/{questions['Subreddit'][i]}")
+                            st.write(f"**Author:** u/{questions['Author'][i]}")
+                            st.write(f"**Posted:** {questions['Created'][i]}")
+                            if content_length > 0:
+                                st.write(f"**Content:** {content_length} chars")
                         
                         st.divider()
                 
                 # Enhanced download with better formatting
-                df = pd.DataFrame(questions)
-                csv = df.to_csv(index=False)
                 st.download_button(
                     label="📥 Download Enhanced Results as CSV",
-                    data=csv,
+                    data=questions_to_csv(questions),
                     file_name=f"reddit_unanswered_enhanced_{keyword}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                     mime="text/csv"
                 )